@@ -1,16 +1,23 @@
 import re
+import os
+import base64
+import copy
+import orjson
+import pickle
 import socket
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import sqlite3
+import uuid
+from fastapi import FastAPI, UploadFile, File, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Set, Tuple, Optional
+from typing import List, Dict, Set, Tuple, Optional, Literal
 import threading
 import uvicorn
 from collections import deque
 from pysat.solvers import Solver
-from itertools import combinations
-from sympy import Symbol, to_cnf
+from sympy import Symbol, to_cnf, And, Or, Not, true, false
 from huggingface_hub import login
 from transformers import pipeline
 from huggingface_hub import InferenceClient
@@ -24,6 +31,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 class FeatureNode:
     def __init__(self, name, mandatory=False):
@@ -43,6 +51,8 @@ class ParsedModel:
         self.feature_map = {}
         self.reverse_map = {}
         self.english_statements = []
+        self.atomic_sets = {}
+        self.atomic_clauses = []
 
 class ValidationResult:
     def __init__(self, valid: bool, message: str, details: List[str]):
@@ -50,24 +60,123 @@ class ValidationResult:
         self.message = message
         self.details = details
 
-# Global model storage with thread safety
-class ModelStorage:
+# Storage backends for ModelStorage; each one implements save, load and delete
+class InMemoryBackend:
+    """Models kept in this process only; fine for a single worker"""
     def __init__(self):
         self._storage = {}
+    
+    def save(self, session_id: str, model: ParsedModel):
+        self._storage[session_id] = model
+    
+    def load(self, session_id: str) -> Optional[ParsedModel]:
+        return self._storage.get(session_id)
+    
+    def delete(self, session_id: str):
+        if session_id in self._storage:
+            del self._storage[session_id]
+
+# Bump whenever ParsedModel changes shape, so rows pickled by older code are ignored
+MODEL_SCHEMA_VERSION = 1
+
+class SQLiteBackend:
+    """
+    Pickled models in a WAL-mode SQLite file that every worker process on the
+    host can share. Each worker keeps a read-through cache of loaded models and
+    only reloads one when its version token in the database changes. Rows
+    written with another MODEL_SCHEMA_VERSION are treated as missing.
+    Loaded models are shared with the cache, so callers must copy a model
+    before changing it.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()
+        self._cache = {}
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Tables from before schema versions hold nothing loadable
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(models)")]
+        if columns and 'schema_version' not in columns:
+            conn.execute("DROP TABLE models")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS models ("
+            "session_id TEXT PRIMARY KEY, version TEXT NOT NULL, "
+            "schema_version INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+    
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def save(self, session_id: str, model: ParsedModel):
+        version = uuid.uuid4().hex
+        self._connection().execute(
+            "INSERT OR REPLACE INTO models (session_id, version, schema_version, data) "
+            "VALUES (?, ?, ?, ?)",
+            (session_id, version, MODEL_SCHEMA_VERSION,
+             pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        )
+        self._cache[session_id] = (version, model)
+    
+    def load(self, session_id: str) -> Optional[ParsedModel]:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT version, schema_version FROM models WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or row[1] != MODEL_SCHEMA_VERSION:
+            self._cache.pop(session_id, None)
+            return None
+        
+        cached = self._cache.get(session_id)
+        if cached and cached[0] == row[0]:
+            return cached[1]
+        
+        row = conn.execute(
+            "SELECT version, data FROM models WHERE session_id = ? AND schema_version = ?",
+            (session_id, MODEL_SCHEMA_VERSION)
+        ).fetchone()
+        if row is None:
+            return None
+        model = pickle.loads(row[1])
+        self._cache[session_id] = (row[0], model)
+        return model
+    
+    def delete(self, session_id: str):
+        self._connection().execute("DELETE FROM models WHERE session_id = ?", (session_id,))
+        self._cache.pop(session_id, None)
+
+def create_storage_backend():
+    # SQLite by default so models are shared however many uvicorn workers run;
+    # "memory" is only safe with a single worker
+    backend = os.environ.get("MODEL_STORAGE_BACKEND", "sqlite").lower()
+    if backend == "sqlite":
+        return SQLiteBackend(os.environ.get("MODEL_STORAGE_PATH", "model_storage.db"))
+    if backend == "memory":
+        return InMemoryBackend()
+    raise ValueError(f"Unknown MODEL_STORAGE_BACKEND '{backend}'. Use 'memory' or 'sqlite'")
+
+# Global model storage with thread safety
+class ModelStorage:
+    def __init__(self, backend=None):
+        self._backend = backend if backend is not None else create_storage_backend()
         self._lock = threading.Lock()
     
     def store_model(self, session_id: str, model: ParsedModel):
         with self._lock:
-            self._storage[session_id] = model
+            self._backend.save(session_id, model)
     
     def get_model(self, session_id: str) -> Optional[ParsedModel]:
         with self._lock:
-            return self._storage.get(session_id)
+            return self._backend.load(session_id)
     
     def clear_model(self, session_id: str):
         with self._lock:
-            if session_id in self._storage:
-                del self._storage[session_id]
+            self._backend.delete(session_id)
 
 model_storage = ModelStorage()
 
@@ -129,6 +238,14 @@ def validate_configuration(
                     f"Mandatory feature '{feature}' must be selected when parent '{props['parent']}' is selected"
                 )
     
+    # Check that every selected feature has its parent selected
+    for feature in selected_features:
+        parent = model.feature_model.get(feature, {}).get('parent')
+        if parent and parent not in selected_features:
+            validation_errors.append(
+                f"Feature '{feature}' requires its parent '{parent}' to be selected"
+            )
+    
     # Check XOR groups
     for feature, props in model.feature_model.items():
         if props['group_type'] == 'xor' and feature in selected_features:
@@ -252,6 +369,7 @@ def parse_feature_xml(xml_content: str) -> ParsedModel:
     parsed_model.clauses, parsed_model.feature_map, parsed_model.reverse_map,parsed_model.english_statements = \
         translate_to_logic(parsed_model.feature_model)
     
+    preprocess_model(parsed_model)
     return parsed_model
 
 
@@ -289,49 +407,192 @@ def translate_to_logic(
                 clauses.append([-feature_id, parent_id])  # child → parent
                 english_statements.append([f"{feature_name} → {feature['parent']}","(Child to Parent constraint)"])
             
-            # XOR groups
-            if feature['group_type'] == 'xor' and feature['children']:
-                children_ids = [feature_map[child] for child in feature['children']]
-                
-                # At least one
-                clauses.append(children_ids)
-                children_names = [f"{child}" for child in feature['children']]
-                #english_statements.append(f"{feature_name} → ({' ∨ '.join(children_names)}) (Atleast One constraint in XOR)")
-                
-                # At most one
-                statment = f"{feature_name} → ( "
-                
-                #now loop over children and do like this(child1 and not child2) or (not child1 and child2)
-                for i in range(len(children_names)):
-                    not_statment = f""
-                    for j in range(len(children_names)):
-                        if i != j:
-                            if j == len(children_names) - 1 or (j == len(children_names) - 2 and j+1==i):
-                                not_statment += f"¬{children_names[j]}"
-                            else:
-                                not_statment += f"¬{children_names[j]} ^ "
-                    if i == len(children_names) - 1:
-                        statment += f"({children_names[i]} ^ {not_statment})"
-                    else:
-                        statment += f"({children_names[i]} ^ {not_statment}) v "
-                english_statements.append([f"{statment}"," (Atmost One Xor constraint)"])            
-
-                for i in range(len(children_ids)):
-                    for j in range(i + 1, len(children_ids)):
-                        clauses.append([-children_ids[i], -children_ids[j]])
-                    
-            # OR groups
-            elif feature['group_type'] == 'or' and feature['children']:
-                children_ids = [feature_map[child] for child in feature['children']]
-                clauses.append(children_ids)  # At least one
-                children_names = [f"{child}" for child in feature['children']]
-                english_statements.append([f"{feature_name} → ({' ∨ '.join(children_names)})"," (Atleast One constraint in OR)"])
-                
-
+        # XOR groups (root groups included)
+        if feature['group_type'] == 'xor' and feature['children']:
+            children_ids = [feature_map[child] for child in feature['children']]
+            
+            # At least one, when the group parent is selected
+            clauses.append([-feature_id] + children_ids)
+            children_names = [f"{child}" for child in feature['children']]
+            #english_statements.append(f"{feature_name} → ({' ∨ '.join(children_names)}) (Atleast One constraint in XOR)")
+            
+            # At most one
+            statment = f"{feature_name} → ( "
+            
+            #now loop over children and do like this(child1 and not child2) or (not child1 and child2)
+            for i in range(len(children_names)):
+                not_statment = f""
+                for j in range(len(children_names)):
+                    if i != j:
+                        if j == len(children_names) - 1 or (j == len(children_names) - 2 and j+1==i):
+                            not_statment += f"¬{children_names[j]}"
+                        else:
+                            not_statment += f"¬{children_names[j]} ^ "
+                if i == len(children_names) - 1:
+                    statment += f"({children_names[i]} ^ {not_statment})"
+                else:
+                    statment += f"({children_names[i]} ^ {not_statment}) v "
+            english_statements.append([f"{statment}"," (Atmost One Xor constraint)"])            
+
+            for i in range(len(children_ids)):
+                for j in range(i + 1, len(children_ids)):
+                    clauses.append([-children_ids[i], -children_ids[j]])
                 
+        # OR groups
+        elif feature['group_type'] == 'or' and feature['children']:
+            children_ids = [feature_map[child] for child in feature['children']]
+            clauses.append([-feature_id] + children_ids)  # At least one
+            children_names = [f"{child}" for child in feature['children']]
+            english_statements.append([f"{feature_name} → ({' ∨ '.join(children_names)})"," (Atleast One constraint in OR)"])
     
     return clauses, feature_map, reverse_map,english_statements
 
+def compute_atomic_sets(feature_model: Dict) -> Dict[str, List[str]]:
+    """Group features that are always selected together, keyed by the topmost feature of each set"""
+    atomic_sets = {}
+    representative = {}
+    
+    # Parents are stored before their children, so a mandatory child joins its parent's set
+    for feature_name, feature in feature_model.items():
+        if feature['parent'] and feature['mandatory']:
+            rep = representative[feature['parent']]
+        else:
+            rep = feature_name
+        representative[feature_name] = rep
+        atomic_sets.setdefault(rep, []).append(feature_name)
+    
+    return atomic_sets
+
+def collapse_atomic_clauses(
+    clauses: List[List[int]],
+    feature_map: Dict[str, int],
+    atomic_sets: Dict[str, List[str]]
+) -> List[List[int]]:
+    """Rewrite clauses over one variable per atomic set; variable i + 1 is the i-th set"""
+    variable = {}
+    for idx, members in enumerate(atomic_sets.values()):
+        for member in members:
+            variable[feature_map[member]] = idx + 1
+    
+    collapsed = []
+    seen = set()
+    for clause in clauses:
+        literals = sorted({variable[abs(lit)] * (1 if lit > 0 else -1) for lit in clause})
+        # Drop tautologies such as parent <-> mandatory child, and duplicates
+        if any(-lit in literals for lit in literals):
+            continue
+        if tuple(literals) not in seen:
+            seen.add(tuple(literals))
+            collapsed.append(literals)
+    
+    return collapsed
+
+def preprocess_model(parsed_model: ParsedModel):
+    parsed_model.atomic_sets = compute_atomic_sets(parsed_model.feature_model)
+    parsed_model.atomic_clauses = collapse_atomic_clauses(
+        parsed_model.clauses, parsed_model.feature_map, parsed_model.atomic_sets
+    )
+
+def constraint_to_clauses(expression: str, feature_map: Dict[str, int]) -> List[List[int]]:
+    cnf_expr = parse_boolean_expression(expression, feature_map)
+    if cnf_expr is true:
+        return []
+    if cnf_expr is false:
+        return [[]]
+    
+    clauses = []
+    for clause in (cnf_expr.args if isinstance(cnf_expr, And) else [cnf_expr]):
+        literals = clause.args if isinstance(clause, Or) else [clause]
+        clauses.append([
+            -feature_map[lit.args[0].name] if isinstance(lit, Not) else feature_map[lit.name]
+            for lit in literals
+        ])
+    return clauses
+
+def get_validation_clauses(parsed_model: ParsedModel) -> List[List[int]]:
+    """Clauses for the checks validate_configuration makes on top of the tree clauses"""
+    # Mandatory features are required whether or not their parent is selected
+    clauses = [[parsed_model.feature_map[feature]]
+               for feature, props in parsed_model.feature_model.items() if props['mandatory']]
+    
+    for constraint in parsed_model.constraints:
+        if not constraint['is_english']:
+            try:
+                clauses.extend(constraint_to_clauses(constraint['expression'], parsed_model.feature_map))
+            except Exception:
+                # validate_configuration rejects every configuration in this case
+                return [[]]
+    return clauses
+
+def get_constraint_features(expression: str, feature_model: Dict) -> Set[str]:
+    expr = expression.lower()
+    return {name for name in feature_model if re.search(rf'\b{name.lower()}\b', expr)}
+
+def slice_feature_model(parsed_model: ParsedModel, root_feature: str) -> ParsedModel:
+    """
+    Cut the model down to the subtree rooted at `root_feature`.
+    The subtree root is always selected, and only constraints that mention
+    features inside the subtree alone are kept, so products of the slice
+    still need find_subtree_wp to check them against the full model.
+    """
+    if root_feature not in parsed_model.feature_model:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Feature '{root_feature}' not found in the model"
+        )
+    
+    subtree = set()
+    queue = deque([root_feature])
+    while queue:
+        feature = queue.popleft()
+        subtree.add(feature)
+        queue.extend(parsed_model.feature_model[feature]['children'])
+    
+    sliced = ParsedModel()
+    for feature_name, feature in parsed_model.feature_model.items():
+        if feature_name not in subtree:
+            continue
+        is_root = feature_name == root_feature
+        sliced.feature_model[feature_name] = {
+            'mandatory': True if is_root else feature['mandatory'],
+            'parent': None if is_root else feature['parent'],
+            'children': list(feature['children']),
+            'group_type': feature['group_type']
+        }
+    
+    for constraint in parsed_model.constraints:
+        if get_constraint_features(constraint['expression'], parsed_model.feature_model) <= subtree:
+            sliced.constraints.append(dict(constraint))
+    
+    sliced.clauses, sliced.feature_map, sliced.reverse_map, sliced.english_statements = \
+        translate_to_logic(sliced.feature_model)
+    preprocess_model(sliced)
+    return sliced
+
+def find_subtree_wp(
+    parsed_model: ParsedModel,
+    root_feature: str
+) -> Tuple[ParsedModel, List[List[str]]]:
+    """
+    Working products of the full model projected onto the subtree under
+    `root_feature`: products of the slice that extend to a valid full
+    configuration. Returns the slice too, for its feature index.
+    """
+    sliced = slice_feature_model(parsed_model, root_feature)
+    clauses = parsed_model.clauses + get_validation_clauses(parsed_model)
+    feature_map = parsed_model.feature_map
+    
+    projected = []
+    with Solver(bootstrap_with=clauses) as solver:
+        for product in find_wp(sliced):
+            selected = set(product)
+            assumptions = [feature_map[f] if f in selected else -feature_map[f]
+                           for f in sliced.feature_model]
+            if solver.solve(assumptions=assumptions):
+                projected.append(product)
+    
+    return sliced, projected
+
 def find_mwp(working_products: List[List[str]]) -> List[List[str]]:
     if not working_products:
         return []
@@ -344,66 +605,82 @@ def find_mwp(working_products: List[List[str]]) -> List[List[str]]:
 
 
 def find_wp(parsed_model: ParsedModel) -> List[List[str]]:
+    """
+    All configurations allowed by the tree clauses plus the validation
+    clauses, found by a SAT solver over one variable per atomic set and
+    expanded back to feature names. These clauses encode every check
+    validate_configuration makes, so products are not re-validated.
+    """
+    # Models pickled before atomic sets existed lack the attributes
+    if not getattr(parsed_model, 'atomic_sets', None):
+        preprocess_model(parsed_model)
+    
+    units = list(parsed_model.atomic_sets.values())
+    clauses = parsed_model.atomic_clauses + collapse_atomic_clauses(
+        get_validation_clauses(parsed_model), parsed_model.feature_map, parsed_model.atomic_sets
+    )
+    
     working_products = []
+    with Solver(bootstrap_with=clauses) as solver:
+        for model in solver.enum_models():
+            features = [f for lit in model if lit > 0 for f in units[lit - 1]]
+            working_products.append(sorted(features, key=parsed_model.feature_map.get))
     
-    def get_mandatory_features() -> Set[str]:
-        mandatory = set()
-        for feature, props in parsed_model.feature_model.items():
-            if props.get('mandatory', False):
-                mandatory.add(feature)
-                # Add all mandatory parents
-                current = feature
-                while current in parsed_model.feature_model:
-                    parent = next((f for f, p in parsed_model.feature_model.items() 
-                                 if current in p.get('children', [])), None)
-                    if parent:
-                        mandatory.add(parent)
-                        current = parent
-                    else:
-                        break
-        return mandatory
-
-    def get_optional_features(mandatory: Set[str]) -> List[str]:
-        return [f for f in parsed_model.feature_model.keys() 
-                if f not in mandatory]
-
-    def handle_group_constraints(feature_set: Set[str]) -> bool:
-        for feature, props in parsed_model.feature_model.items():
-            if feature not in feature_set:
-                continue
-            children = props.get('children', [])
-            if not children:
-                continue
-            
-            selected_children = [c for c in children if c in feature_set]
-            
-            if props.get('relation') == 'XOR' and len(selected_children) > 1:
-                return False
-            if props.get('relation') == 'OR' and selected_children and not any(c in feature_set for c in children):
-                return False
-        return True
-
-    # Start with mandatory features
-    mandatory_features = get_mandatory_features()
-    optional_features = get_optional_features(mandatory_features)
-    base_config = list(mandatory_features)
-
-    # Validate base configuration
-    if validate_configuration(set(base_config), parsed_model).valid:
-        working_products.append(base_config)
-
-    # Try adding optional features incrementally
-    for r in range(1, len(optional_features) + 1):
-        for opt_combo in combinations(optional_features, r):
-            candidate = base_config + list(opt_combo)
-            if handle_group_constraints(set(candidate)):
-                if validate_configuration(set(candidate), parsed_model).valid:
-                    working_products.append(candidate)
-
+    # Smallest products first, as the old combination search returned them
+    working_products.sort(key=lambda product: (len(product), [parsed_model.feature_map[f] for f in product]))
     return working_products    
+
+# Product list encodings accepted by the `encoding` query parameter.
+# "names" keeps the original list-of-names format the frontend uses.
+ProductEncoding = Literal["names", "bitset", "delta"]
+
+def get_feature_index(parsed_model: ParsedModel) -> List[str]:
+    """Feature names ordered by index; position i is feature id i + 1"""
+    return [parsed_model.reverse_map[idx] for idx in sorted(parsed_model.reverse_map)]
+
+def encode_product_bitset(product: List[str], feature_map: Dict[str, int]) -> str:
+    """Encode a product as a little-endian base64 bitset over the feature index"""
+    bits = 0
+    for name in product:
+        bits |= 1 << (feature_map[name] - 1)
+    n_bytes = (len(feature_map) + 7) // 8
+    return base64.b64encode(bits.to_bytes(n_bytes, 'little')).decode('ascii')
+
+def encode_product_delta(product: List[str], feature_map: Dict[str, int]) -> List[int]:
+    """Encode a product as sorted feature indexes, each stored as the gap to the previous one"""
+    indexes = sorted(feature_map[name] - 1 for name in product)
+    return [current - previous for previous, current in zip([0] + indexes, indexes)]
+
+def encode_products(
+    products: List[List[str]],
+    feature_map: Dict[str, int],
+    encoding: ProductEncoding
+) -> List:
+    if encoding == 'bitset':
+        return [encode_product_bitset(product, feature_map) for product in products]
+    if encoding == 'delta':
+        return [encode_product_delta(product, feature_map) for product in products]
+    return products
+
+def build_products_response(
+    content: Dict,
+    product_keys: Tuple[str, ...],
+    parsed_model: ParsedModel,
+    encoding: ProductEncoding
+):
+    """Encode the product lists in `content` and serialize compact encodings with orjson"""
+    if encoding == 'names':
+        return content
+    
+    for key in product_keys:
+        if key in content:
+            content[key] = encode_products(content[key], parsed_model.feature_map, encoding)
+    content["encoding"] = encoding
+    content["features"] = get_feature_index(parsed_model)
+    return Response(orjson.dumps(content), media_type="application/json")
     
 @app.get("/mwp")
-async def get_mwp():
+async def get_mwp(encoding: ProductEncoding = "names", subtree: Optional[str] = None):
     try:
         session_id = "default_session"  # In production, get this from request
         parsed_model = model_storage.get_model(session_id)
@@ -414,18 +691,24 @@ async def get_mwp():
                 detail="No feature model uploaded. Please upload a model first."
             )
         
-        wp = find_wp(parsed_model)
+        if subtree:
+            parsed_model, wp = find_subtree_wp(parsed_model, subtree)
+        else:
+            wp = find_wp(parsed_model)
         mwp = find_mwp(wp)
         
-        return {
+        response = {
             "working_products": wp,
             "mwp": mwp
         }
+        if subtree:
+            response["subtree"] = subtree
+        return build_products_response(response, ("working_products", "mwp"), parsed_model, encoding)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
 @app.get("/wp")
-async def get_wp():
+async def get_wp(encoding: ProductEncoding = "names", subtree: Optional[str] = None):
     try:
         session_id = "default_session"  # In production, get this from request
         parsed_model = model_storage.get_model(session_id)
@@ -436,13 +719,19 @@ async def get_wp():
                 detail="No feature model uploaded. Please upload a model first."
             )
         
-        wp = find_wp(parsed_model)
+        if subtree:
+            parsed_model, wp = find_subtree_wp(parsed_model, subtree)
+        else:
+            wp = find_wp(parsed_model)
         mwp = find_mwp(wp)
         
-        return {
+        response = {
             "working_products": wp,
             "mwp": mwp
         }
+        if subtree:
+            response["subtree"] = subtree
+        return build_products_response(response, ("working_products", "mwp"), parsed_model, encoding)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -494,7 +783,7 @@ class ConstraintUpdate(BaseModel):
     boolean_translation: str
     
 @app.post("/update_constraint")
-async def update_constraint(update: ConstraintUpdate):
+async def update_constraint(update: ConstraintUpdate, encoding: ProductEncoding = "names"):
     try:
         session_id = "default_session"
         parsed_model = model_storage.get_model(session_id)
@@ -505,6 +794,10 @@ async def update_constraint(update: ConstraintUpdate):
                 detail="No feature model uploaded"
             )
         
+        # Work on a copy: the stored model is shared with the storage cache
+        # and must only change through store_model
+        parsed_model = copy.deepcopy(parsed_model)
+        
         # Find and update matching English constraint
         found = False
         for constraint in parsed_model.constraints:
@@ -528,14 +821,14 @@ async def update_constraint(update: ConstraintUpdate):
         # Store updated model
         model_storage.store_model(session_id, parsed_model)
         
-        return {
+        return build_products_response({
             "message": "Constraint updated successfully",
             "updated_constraint": update.boolean_translation,
             "feature_model": parsed_model.feature_model,
             "constraints": parsed_model.constraints,
             "wp": wp,
             "mwp": mwp
-        }
+        }, ("wp", "mwp"), parsed_model, encoding)
         
     except Exception as e:
         raise HTTPException(
@@ -545,24 +838,31 @@ async def update_constraint(update: ConstraintUpdate):
 
 
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(
+    file: UploadFile = File(...),
+    encoding: ProductEncoding = "names",
+    include_products: bool = True
+):
     try:
         content = await file.read()
         parsed_model = parse_feature_xml(content.decode())
-        wp = find_wp(parsed_model)
-        mwp = find_mwp(wp)
-        # print("MWP: ", mwp)
+        
+        response = {
+            "feature_model": parsed_model.feature_model,
+            "constraints": parsed_model.constraints
+        }
+        # Products can be skipped and fetched later from /wp and /mwp
+        if include_products:
+            wp = find_wp(parsed_model)
+            response["mwp"] = find_mwp(wp)
+            response["wp"] = wp
+            # print("MWP: ", response["mwp"])
         
         # Store the model with a session ID
         session_id = "default_session"  # In production, generate unique session IDs
         model_storage.store_model(session_id, parsed_model)
         
-        return {
-            "feature_model": parsed_model.feature_model,
-            "constraints": parsed_model.constraints,
-            "mwp": mwp,
-            "wp": wp
-        }
+        return build_products_response(response, ("mwp", "wp"), parsed_model, encoding)
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -718,4 +1018,5 @@ Convert this constraint: {request['constraint']}"""
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000)
\ No newline at end of file
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
\ No newline at end of file
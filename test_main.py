@@ -0,0 +1,238 @@
+import base64
+import os
+import sqlite3
+
+# Keep the module-level model_storage from creating a database file
+os.environ.setdefault('MODEL_STORAGE_BACKEND', 'memory')
+
+from fastapi.testclient import TestClient
+
+import main
+
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), 'models')
+
+
+FEATURE_MAP = {name: idx + 1 for idx, name in enumerate(
+    ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J']
+)}
+FEATURES = list(FEATURE_MAP)
+
+
+def decode_bitset(encoded):
+    bits = int.from_bytes(base64.b64decode(encoded), 'little')
+    return [name for idx, name in enumerate(FEATURES) if bits >> idx & 1]
+
+
+def decode_delta(gaps):
+    indexes = []
+    for gap in gaps:
+        indexes.append(gap + (indexes[-1] if indexes else 0))
+    return [FEATURES[idx] for idx in indexes]
+
+
+def test_bitset_encoding_round_trip():
+    encoded = main.encode_product_bitset(['J', 'A', 'C'], FEATURE_MAP)
+    assert encoded == 'BQI='
+    assert decode_bitset(encoded) == ['A', 'C', 'J']
+
+
+def test_delta_encoding_round_trip():
+    encoded = main.encode_product_delta(['J', 'A', 'C'], FEATURE_MAP)
+    assert encoded == [0, 2, 7]
+    assert decode_delta(encoded) == ['A', 'C', 'J']
+
+
+def test_names_encoding_is_unchanged():
+    products = [['A', 'B'], ['C']]
+    assert main.encode_products(products, FEATURE_MAP, 'names') is products
+
+
+def upload(client, name, **params):
+    with open(os.path.join(MODELS_DIR, name), 'rb') as f:
+        return client.post('/upload', params=params, files={'file': (name, f)})
+
+
+def test_upload_compact_response():
+    client = TestClient(main.app)
+    plain = upload(client, 'featuremodel-1-both.xml').json()
+    response = upload(client, 'featuremodel-1-both.xml', encoding='bitset')
+    assert response.status_code == 200
+    
+    body = response.json()
+    assert body['encoding'] == 'bitset'
+    assert body['features'] == list(body['feature_model'])
+    features = body['features']
+    decoded = []
+    for encoded in body['wp']:
+        bits = int.from_bytes(base64.b64decode(encoded), 'little')
+        decoded.append([name for idx, name in enumerate(features) if bits >> idx & 1])
+    assert decoded == plain['wp']
+
+
+def test_upload_without_products():
+    client = TestClient(main.app)
+    body = upload(client, 'featuremodel-1-both.xml', include_products='false').json()
+    assert 'wp' not in body and 'mwp' not in body
+    assert 'feature_model' in body
+    
+    wp = client.get('/wp', params={'encoding': 'delta'}).json()
+    assert wp['encoding'] == 'delta'
+    assert len(wp['working_products']) == 14
+
+
+def test_large_responses_are_gzipped():
+    client = TestClient(main.app)
+    upload(client, 'feature-model.xml', include_products='false')
+    response = client.get('/wp', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert len(response.json()['working_products']) == 81
+
+
+def test_unknown_encoding_is_rejected():
+    client = TestClient(main.app)
+    upload(client, 'featuremodel-1-both.xml', include_products='false')
+    assert client.get('/wp', params={'encoding': 'bogus'}).status_code == 422
+    response = client.post(
+        '/update_constraint',
+        params={'encoding': 'bogus'},
+        json={'english_statement': 'Tetris requires Basic', 'boolean_translation': 'Tetris -> Basic'}
+    )
+    assert response.status_code == 422
+
+
+def load_model(name):
+    with open(os.path.join(MODELS_DIR, name)) as f:
+        return main.parse_feature_xml(f.read())
+
+
+def test_atomic_sets_collapse_mandatory_children():
+    model = load_model('featuremodel-1-both.xml')
+    assert model.atomic_sets['MobilePhone'] == ['MobilePhone', 'Camera', 'Screen']
+    assert model.atomic_sets['Applications'] == ['Applications', 'Java', 'Games']
+    assert max(abs(lit) for clause in model.atomic_clauses for lit in clause) == len(model.atomic_sets)
+
+
+def test_find_wp_products_are_valid():
+    model = load_model('featuremodel-1-both.xml')
+    products = main.find_wp(model)
+    # The old search validated all 2 ** 6 subsets of the non-mandatory features;
+    # the solver yields only the 14 products
+    assert len(products) == 14
+    assert all(main.validate_configuration(set(p), model).valid for p in products)
+
+
+def test_find_wp_matches_validate_configuration():
+    model = load_model('featuremodel-2-wo-const.xml')
+    names = list(model.feature_model)
+    valid = set()
+    for mask in range(1, 2 ** len(names)):
+        selected = {name for idx, name in enumerate(names) if mask >> idx & 1}
+        if main.validate_configuration(selected, model).valid:
+            valid.add(frozenset(selected))
+    assert {frozenset(p) for p in main.find_wp(model)} == valid
+
+
+def test_child_without_parent_is_invalid():
+    model = load_model('feature-model.xml')
+    for product in main.find_wp(model):
+        if 'SMS' in product or 'Call' in product:
+            assert 'Notification' in product
+    
+    selected = {'Application', 'Catalog', 'Filtered', 'ByDiscount', 'Payment', 'CreditCard',
+                'Location', 'GPS', 'SMS'}
+    result = main.validate_configuration(selected, model)
+    assert not result.valid
+    assert result.details == ["Feature 'SMS' requires its parent 'Notification' to be selected"]
+
+
+def test_slice_at_screen():
+    model = load_model('featuremodel-1-wo-const.xml')
+    sliced = main.slice_feature_model(model, 'Screen')
+    assert main.find_wp(sliced) == [['Screen', 'Basic'], ['Screen', 'HighRes']]
+    # The full model is void (XOR group with two mandatory children), so no
+    # slice product extends to a valid configuration
+    assert main.find_subtree_wp(model, 'Screen')[1] == []
+
+
+def test_subtree_products_respect_outside_constraints():
+    model = load_model('featuremodel-1-both.xml')
+    assert main.find_subtree_wp(model, 'Screen')[1] == [['Screen', 'Basic'], ['Screen', 'HighRes']]
+    
+    model.constraints.append({'expression': 'Memory -> Basic', 'is_english': False})
+    # Java -> Memory and Java is mandatory, so HighRes can no longer be selected
+    assert main.find_subtree_wp(model, 'Screen')[1] == [['Screen', 'Basic']]
+    assert main.find_subtree_wp(model, 'HighRes')[1] == []
+
+
+def test_sqlite_backends_share_models(tmp_path):
+    path = str(tmp_path / 'models.db')
+    writer = main.SQLiteBackend(path)
+    reader = main.SQLiteBackend(path)
+    
+    first = load_model('featuremodel-1-both.xml')
+    writer.save('session', first)
+    assert reader.load('session').feature_model == first.feature_model
+    
+    second = load_model('feature-model.xml')
+    writer.save('session', second)
+    assert reader.load('session').feature_model == second.feature_model
+    
+    writer.delete('session')
+    assert reader.load('session') is None
+
+
+def test_sqlite_cache_reuses_loaded_model(tmp_path):
+    path = str(tmp_path / 'models.db')
+    main.SQLiteBackend(path).save('session', load_model('featuremodel-1-both.xml'))
+    
+    reader = main.SQLiteBackend(path)
+    assert reader.load('session') is reader.load('session')
+
+
+def test_sqlite_ignores_other_schema_versions(tmp_path, monkeypatch):
+    path = str(tmp_path / 'models.db')
+    main.SQLiteBackend(path).save('session', load_model('featuremodel-1-both.xml'))
+    
+    monkeypatch.setattr(main, 'MODEL_SCHEMA_VERSION', main.MODEL_SCHEMA_VERSION + 1)
+    assert main.SQLiteBackend(path).load('session') is None
+
+
+def test_sqlite_replaces_unversioned_table(tmp_path):
+    path = str(tmp_path / 'models.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE models (session_id TEXT PRIMARY KEY, version TEXT, data BLOB)")
+    conn.execute("INSERT INTO models VALUES ('session', 'old', x'00')")
+    conn.commit()
+    conn.close()
+    
+    backend = main.SQLiteBackend(path)
+    assert backend.load('session') is None
+    backend.save('session', load_model('featuremodel-1-both.xml'))
+    assert backend.load('session') is not None
+
+
+def test_model_storage_default_backend(tmp_path, monkeypatch):
+    assert isinstance(main.ModelStorage()._backend, main.InMemoryBackend)
+    monkeypatch.setenv('MODEL_STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('MODEL_STORAGE_PATH', str(tmp_path / 'models.db'))
+    assert isinstance(main.ModelStorage()._backend, main.SQLiteBackend)
+
+
+def test_failed_constraint_update_keeps_stored_model(tmp_path, monkeypatch):
+    storage = main.ModelStorage(main.SQLiteBackend(str(tmp_path / 'models.db')))
+    monkeypatch.setattr(main, 'model_storage', storage)
+    client = TestClient(main.app)
+    upload(client, 'featuremodel-1-both.xml', include_products='false')
+    
+    def fail(parsed_model):
+        raise RuntimeError('boom')
+    monkeypatch.setattr(main, 'find_wp', fail)
+    response = client.post('/update_constraint', json={
+        'english_statement': 'Tetris requires Basic',
+        'boolean_translation': 'Tetris -> Basic'
+    })
+    assert response.status_code == 500
+    
+    constraint = storage.get_model('default_session').constraints[-1]
+    assert constraint == {'expression': 'Tetris requires Basic', 'is_english': True}